@@ -29,6 +29,13 @@ def process_data(data_queue):
     shm_mm = mmap.mmap(shm_fd, ctypes.sizeof(voxel_double_buffer_t), mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE)
     buffer = voxel_double_buffer_t.from_buffer(shm_mm)
 
+    # Cache the numpy views of both pages once; np.ctypeslib.as_array
+    # rebuilds an array descriptor on every call
+    voxel_views = [
+        np.ctypeslib.as_array(buffer.buffers[0]).reshape((voxels_y, voxels_x, voxels_z)),
+        np.ctypeslib.as_array(buffer.buffers[1]).reshape((voxels_y, voxels_x, voxels_z))
+    ]
+
     while True:
         if not data_queue.empty():
             data = data_queue.get()
@@ -43,7 +50,7 @@ def process_data(data_queue):
             z = point_data[:, 2]
             pix = point_data[:, 3]
             
-            voxels = np.ctypeslib.as_array(buffer.buffers[page]).reshape((128,128,64))
+            voxels = voxel_views[page]
             voxels[y, x, z] = pix
             
             buffer.page = page
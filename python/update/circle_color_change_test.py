@@ -1,8 +1,8 @@
 import socket
 import struct
-import gzip
 import time
 import math
+import numpy as np
 import pygame
 import sys
 
@@ -15,6 +15,13 @@ VOX_X = 128
 VOX_Y = 128
 VOX_Z = 64
 
+# Header: 3 signature bytes + 1 flags byte (legacy senders put 0xff here,
+# i.e. every flag set). Point packets are tiny, so on a LAN the gzip CPU
+# costs far more than the bytes it saves - send raw SoA planes by default.
+FLAG_GZIP = 0x01  # set = gzip-compressed payload
+FLAG_AOS = 0x02   # set = interleaved BBBB records, clear = SoA planes
+HEADER_RAW = b'\xff\xff\xff' + bytes([0xff & ~(FLAG_GZIP | FLAG_AOS)])
+
 # --- COLOR DEFINITIONS (RRR GG BB) ---
 COLORS = [
     0xE0,  # Red     (111 00 00)
@@ -26,42 +33,54 @@ COLORS = [
     0xFF,  # White   (111 111 11)
 ]
 
+_sphere_templates = {}
+
+def sphere_template(radius):
+    """Offsets of every voxel inside a sphere of this radius, built once."""
+    template = _sphere_templates.get(radius)
+    if template is None:
+        d = np.arange(-radius, radius + 1)
+        dx, dy, dz = np.meshgrid(d, d, d, indexing='ij')
+        mask = dx * dx + dy * dy + dz * dz <= radius * radius
+        template = np.stack([dx[mask], dy[mask], dz[mask]], axis=1).astype(np.int16)
+        _sphere_templates[radius] = template
+    return template
+
 def generate_sphere_packet(cx, cy, cz, radius, color):
     """
     Generates a solid 3D sphere at center (cx, cy, cz).
     """
-    points = []
-    
-    # Optimization: Only scan the bounding box
-    min_x = int(max(0, cx - radius))
-    max_x = int(min(VOX_X, cx + radius + 1))
-    
-    min_y = int(max(0, cy - radius))
-    max_y = int(min(VOX_Y, cy + radius + 1))
-    
-    min_z = int(max(0, cz - radius))
-    max_z = int(min(VOX_Z, cz + radius + 1))
-
-    radius_sq = radius * radius
-
-    for x in range(min_x, max_x):
-        for y in range(min_y, max_y):
-            for z in range(min_z, max_z):
-                # Distance formula
-                if (x - cx)**2 + (y - cy)**2 + (z - cz)**2 <= radius_sq:
-                    points.append((x, y, z, color))
-
-    # Pack into binary
-    raw_data = bytearray()
-    for p in points:
-        raw_data.extend(struct.pack('BBBB', *p))
-
-    # Compress
-    compressed = gzip.compress(raw_data)
-    header = b'\xff\xff\xff\xff'
-    length = struct.pack('>I', len(compressed))
-    
-    return header + length + compressed
+    # The sphere's shape never changes - translate the precomputed offset
+    # template to the centre and clip to the display bounds
+    pts = sphere_template(radius) + np.array([int(cx), int(cy), int(cz)], dtype=np.int16)
+    pts = pts[((pts >= 0) & (pts < (VOX_X, VOX_Y, VOX_Z))).all(axis=1)]
+
+    # Pack as SoA planes (count, then x[], y[], z[], pix[]) so the receiver
+    # gets each coordinate as one contiguous slice instead of strided bytes.
+    # Sent uncompressed - the payload is small and the LAN is fast.
+    planes = np.empty((4, len(pts)), dtype=np.uint8)
+    planes[:3] = pts.T
+    planes[3] = color
+    return struct.pack('>I', len(pts)) + planes.tobytes()
+
+# Reused 8-byte header (signature+flags, then payload length patched in place)
+_header_buf = bytearray(HEADER_RAW + b'\x00\x00\x00\x00')
+
+def send_packet(sock, payload):
+    """Send header + payload as one vectored write, no concatenation.
+
+    sendmsg may write less than the whole message once the socket buffer
+    fills; the stream is length-prefixed, so any shortfall must be
+    resent or the receiver desyncs and drops the connection.
+    """
+    struct.pack_into('>I', _header_buf, 4, len(payload))
+    sent = sock.sendmsg([_header_buf, payload])
+    header_len = len(_header_buf)
+    if sent < header_len:
+        sock.sendall(memoryview(_header_buf)[sent:])
+        sent = header_len
+    if sent < header_len + len(payload):
+        sock.sendall(memoryview(payload)[sent - header_len:])
 
 def main():
     # 1. Init Pygame
@@ -75,6 +94,8 @@ def main():
     try:
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         sock.connect((HOST_IP, PORT))
+        # Disable Nagle so each frame's packet leaves immediately
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
         print("Connected! Press SPACEBAR to change colors.")
     except Exception as e:
         print(f"Connection Failed: {e}")
@@ -118,8 +139,8 @@ def main():
 
         # --- C. SEND DATA ---
         try:
-            packet = generate_sphere_packet(pos_x, pos_y, pos_z, sphere_radius, current_color)
-            sock.sendall(packet)
+            payload = generate_sphere_packet(pos_x, pos_y, pos_z, sphere_radius, current_color)
+            send_packet(sock, payload)
         except Exception as e:
             print(f"Transmission Error: {e}")
             break
@@ -1,13 +1,77 @@
 import ctypes
 import os
 import mmap
+import socket
+import sys
 import threading
 import numpy as np
 import asyncio
 import struct
-import gzip
+import zlib
+import concurrent.futures
 from collections import deque
 
+# Sanity cap (prevent memory attacks), applied both to the compressed
+# packet read off the wire and to what a frame may decompress into
+MAX_PACKET = 10_000_000
+
+# Use ISA-L's accelerated zlib when available (2-3x faster gzip decompress),
+# otherwise fall back to the stdlib
+try:
+    import isal.isal_zlib as izlib
+    _gzip_decompressobj = izlib.decompressobj
+except ImportError:
+    _gzip_decompressobj = zlib.decompressobj
+
+def decompress_frame(data):
+    # wbits=31 selects gzip framing; decompress through an object so the
+    # output is capped - plain decompress() would happily inflate a tiny
+    # bomb packet into gigabytes
+    d = _gzip_decompressobj(31)
+    out = d.decompress(data, MAX_PACKET)
+    if d.unconsumed_tail:
+        raise ValueError("frame decompresses past MAX_PACKET")
+    return out
+
+# zstd-compressed frames from newer senders
+try:
+    import zstandard as zstd
+    _zstd_decompressor = zstd.ZstdDecompressor()
+
+    def decompress_zstd(data):
+        # max_output_size makes zstd error out instead of inflating
+        # beyond the packet cap
+        return _zstd_decompressor.decompress(data, max_output_size=MAX_PACKET)
+except ImportError:
+    def decompress_zstd(data):
+        raise RuntimeError("zstd frame received but zstandard is not installed")
+
+# Numba fuses bounds check + scatter + written-index tracking into one
+# compiled pass over the packet; fall back to the NumPy path without it
+try:
+    from numba import njit
+
+    @njit(cache=True, boundscheck=False, nogil=True)
+    def scatter_points(x, y, z, pix, voxels_flat, written):
+        """Scatter point columns into the flat voxel buffer.
+
+        Records the index of every stored voxel into `written` and
+        returns how many were stored (out-of-bounds points are skipped).
+        The columns may be contiguous SoA planes or strided AoS views.
+        Runs without the GIL, so the asyncio thread keeps receiving
+        while a frame is being scattered.
+        """
+        n = 0
+        for i in range(len(x)):
+            if x[i] < 128 and y[i] < 128 and z[i] < 64:
+                idx = np.int32(y[i]) * 8192 + np.int32(x[i]) * 64 + np.int32(z[i])
+                voxels_flat[idx] = pix[i]
+                written[n] = idx
+                n += 1
+        return n
+except ImportError:
+    scatter_points = None
+
 # --- CONFIGURATION ---
 # These must match your C driver exactly
 voxels_x = 128
@@ -15,6 +79,13 @@ voxels_y = 128
 voxels_z = 64
 voxels_count = voxels_x * voxels_y * voxels_z
 
+# Header: 3 signature bytes + 1 flags byte (legacy senders put 0xff here,
+# i.e. every flag set).
+FLAG_GZIP = 0x01       # set = gzip-compressed payload
+FLAG_AOS = 0x02        # set = interleaved BBBB records, clear = SoA planes
+FLAG_NO_ZSTD = 0x04    # clear = zstd-compressed payload
+FLAG_NO_PACKED = 0x08  # clear = packed '<u4' points (x<<25|y<<18|z<<12|c<<4)
+
 class voxel_double_buffer_t(ctypes.Structure):
     _fields_ = [("buffers", ctypes.c_uint8 * voxels_z * voxels_x * voxels_y * 2),
                 ("page", ctypes.c_uint8),
@@ -23,17 +94,37 @@ class voxel_double_buffer_t(ctypes.Structure):
                 ("rpm", ctypes.c_uint16),
                 ("uspf", ctypes.c_uint16)]
 
-# Use deque with maxlen=1 for automatic dropping of old frames
+# Use deque with maxlen=1 for automatic dropping of old frames.
+# Single producer, single consumer: append/popleft are each atomic under
+# the GIL and maxlen=1 drops stale frames, so no lock is needed.
 frame_queue = deque(maxlen=1)
-queue_lock = threading.Lock()
 
-# Pre-allocate reusable buffer for point data
-point_buffer = np.empty((voxels_count, 4), dtype=np.uint8)
+# Set by the producer after each append so the consumer wakes immediately
+# instead of polling on a sleep
+frame_ready = threading.Event()
+
+# Thread pool for decompression so the event loop can keep reading the
+# next packet while the current one decompresses. A single worker keeps
+# completions in arrival order - with two, an older frame could finish
+# after a newer one and win the maxlen=1 queue
+decompress_pool = concurrent.futures.ThreadPoolExecutor(max_workers=1)
 
 def process_data():
     """Optimized processing thread with minimal allocations"""
     print("[Thread] Processing thread started...")
-    
+
+    # Pin to a dedicated core so the thread keeps its warm cache, and ask
+    # for FIFO scheduling for deterministic frame latency. Both are
+    # best-effort: they need a multi-core box and CAP_SYS_NICE.
+    try:
+        os.sched_setaffinity(0, {3})
+    except (AttributeError, OSError):
+        pass
+    try:
+        os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(50))
+    except (AttributeError, OSError):
+        pass
+
     try:
         # Open shared memory once
         shm_fd = os.open("/dev/shm/vortex_double_buffer", os.O_RDWR)
@@ -50,76 +141,155 @@ def process_data():
             np.ctypeslib.as_array(buffer.buffers[0]).reshape((voxels_y, voxels_x, voxels_z)),
             np.ctypeslib.as_array(buffer.buffers[1]).reshape((voxels_y, voxels_x, voxels_z))
         ]
+
+        # Raw page base addresses so full clears go through glibc memset,
+        # which saturates write bandwidth better than NumPy's generic fill
+        page_addrs = [ctypes.addressof(buffer.buffers[0]),
+                      ctypes.addressof(buffer.buffers[1])]
+
+        # Raw c_uint8 aliased onto the page control word: .value accesses
+        # are bare one-byte loads/stores with no NumPy indexing or ctypes
+        # Structure descriptor machinery on the per-frame flip
+        page_word = ctypes.c_uint8.from_address(
+            ctypes.addressof(buffer) + voxel_double_buffer_t.page.offset)
         
         frame_count = 0
         last_print = 0
-        
+
+        # Flat indices written to each page last frame, for differential clear
+        last_indices = [None, None]
+
+        # Per-page scratch for the Numba kernel's written-index log
+        if scatter_points is not None:
+            written_bufs = [np.empty(voxels_count, dtype=np.int32),
+                            np.empty(voxels_count, dtype=np.int32)]
+
         while True:
-            # Non-blocking queue check
-            data = None
-            with queue_lock:
-                if frame_queue:
-                    data = frame_queue.popleft()
-            
-            if data is None:
-                # Small sleep to prevent CPU spinning
-                threading.Event().wait(0.001)
+            # Lock-free hand-off: try the queue first and only block on
+            # the event when it comes up empty - no polling, and no event
+            # bookkeeping at all while frames keep arriving
+            try:
+                flags, data = frame_queue.popleft()
+            except IndexError:
+                frame_ready.wait()
+                frame_ready.clear()
                 continue
             
             try:
                 # Get inactive page
-                current_page = buffer.page
+                current_page = page_word.value
                 write_page = 1 - current_page
                 
                 # Get view for writing
                 voxels = voxel_views[write_page]
+
+                # Differential clear: zero only the voxels this page held
+                # last frame instead of rewriting the whole 1 MiB buffer
+                if last_indices[write_page] is not None:
+                    voxels.reshape(-1)[last_indices[write_page]] = 0
+                    last_indices[write_page] = None
+                else:
+                    ctypes.memset(page_addrs[write_page], 0, voxels_count)
                 
-                # Fast clear using numpy
-                voxels.fill(0)
-                
-                # Parse point data
-                num_points = len(data) // 4
-                
+                # Parse point data into per-coordinate columns. The
+                # payload comes off the network, so validate its length
+                # against the claimed layout before handing equal-length
+                # columns to the boundscheck=False scatter kernel.
+                if not flags & FLAG_NO_PACKED:
+                    # Packed uint32 words: x<<25 | y<<18 | z<<12 | c<<4.
+                    # Four shift-and-mask passes unpack the whole frame;
+                    # x/y/z cannot exceed their bit width so every point
+                    # is in bounds by construction.
+                    if len(data) % 4:
+                        print("[Thread] Warning: dropped packed frame with"
+                              f" ragged payload ({len(data)} bytes)")
+                        continue
+                    words = np.frombuffer(data, dtype='<u4')
+                    num_points = len(words)
+                    x = ((words >> 25) & 0x7F).astype(np.uint8)
+                    y = ((words >> 18) & 0x7F).astype(np.uint8)
+                    z = ((words >> 12) & 0x3F).astype(np.uint8)
+                    pix = ((words >> 4) & 0xFF).astype(np.uint8)
+                elif flags & FLAG_AOS:
+                    arr = np.frombuffer(data, dtype=np.uint8)
+                    # Interleaved BBBB records: strided column views,
+                    # trimmed to whole records so the columns line up
+                    num_points = len(arr) // 4
+                    arr = arr[:num_points * 4]
+                    x = arr[0::4]
+                    y = arr[1::4]
+                    z = arr[2::4]
+                    pix = arr[3::4]
+                else:
+                    # SoA planes: >I count, then x[], y[], z[], pix[]
+                    if len(data) < 4:
+                        print("[Thread] Warning: dropped SoA frame shorter"
+                              " than its count prefix")
+                        continue
+                    num_points = struct.unpack_from('>I', data)[0]
+                    if len(data) != 4 + 4 * num_points:
+                        print("[Thread] Warning: dropped SoA frame claiming"
+                              f" {num_points} points in {len(data)} bytes")
+                        continue
+                    cols = np.frombuffer(data, dtype=np.uint8)[4:]
+                    x = cols[:num_points]
+                    y = cols[num_points:2 * num_points]
+                    z = cols[2 * num_points:3 * num_points]
+                    pix = cols[3 * num_points:4 * num_points]
+
+                if num_points > voxels_count:
+                    # More points than voxels is duplicates at best, and
+                    # the written-index log is sized voxels_count - trim
+                    # so the compiled kernel cannot write past its end
+                    print(f"[Thread] Warning: trimming frame of {num_points}"
+                          f" points to {voxels_count}")
+                    x = x[:voxels_count]
+                    y = y[:voxels_count]
+                    z = z[:voxels_count]
+                    pix = pix[:voxels_count]
+                    num_points = voxels_count
+
                 if num_points == 0:
                     continue
-                
-                # Reuse pre-allocated buffer if possible
-                if num_points <= len(point_buffer):
-                    point_data = np.frombuffer(data, dtype=np.uint8).reshape(-1, 4)
+
+                if scatter_points is not None:
+                    # One fused compiled pass over the packet
+                    written = written_bufs[write_page]
+                    points_written = scatter_points(x, y, z, pix,
+                                                    voxels.reshape(-1), written)
+                    if points_written > 0:
+                        last_indices[write_page] = written[:points_written]
                 else:
-                    point_data = np.frombuffer(data, dtype=np.uint8).reshape(-1, 4)
-                
-                # Extract coordinates (vectorized)
-                x = point_data[:, 0]
-                y = point_data[:, 1]
-                z = point_data[:, 2]
-                pix = point_data[:, 3]
-                
-                # Vectorized bounds checking
-                valid_mask = (x < voxels_x) & (y < voxels_y) & (z < voxels_z)
-                num_invalid = np.sum(~valid_mask)
-                
-                if num_invalid > 0:
-                    # Only filter if there are invalid points
-                    x = x[valid_mask]
-                    y = y[valid_mask]
-                    z = z[valid_mask]
-                    pix = pix[valid_mask]
-                    
-                    if num_invalid > 10:  # Only warn if significant
-                        print(f"[Thread] Warning: Filtered {num_invalid} out-of-bound points")
-                
-                # Fast assignment using advanced indexing
-                if len(x) > 0:
-                    voxels[y, x, z] = pix
+                    # Vectorized bounds checking - one pass over the mask,
+                    # no ~mask temporary
+                    valid_mask = (x < voxels_x) & (y < voxels_y) & (z < voxels_z)
+                    n_valid = int(valid_mask.sum())
+
+                    if n_valid != num_points:
+                        # Only filter if there are invalid points
+                        x = x[valid_mask]
+                        y = y[valid_mask]
+                        z = z[valid_mask]
+                        pix = pix[valid_mask]
+
+                        if num_points - n_valid > 10:  # Only warn if significant
+                            print(f"[Thread] Warning: Filtered {num_points - n_valid} out-of-bound points")
+
+                    # Fast assignment via one fused flat index instead of 3-d
+                    # fancy indexing (y stride = 128*64 = 2^13, x stride = 64 = 2^6)
+                    points_written = len(x)
+                    if points_written > 0:
+                        flat = (y.astype(np.int32) << 13) | (x.astype(np.int32) << 6) | z
+                        voxels.reshape(-1)[flat] = pix
+                        last_indices[write_page] = flat
                 
-                # Atomic page flip
-                buffer.page = write_page
+                # Atomic page flip (single byte store)
+                page_word.value = write_page
                 
                 # Performance monitoring (every 100 frames)
                 frame_count += 1
                 if frame_count - last_print >= 100:
-                    print(f"[Thread] Processed {frame_count} frames ({len(x)} points)")
+                    print(f"[Thread] Processed {frame_count} frames ({points_written} points)")
                     last_print = frame_count
             
             except Exception as e:
@@ -135,82 +305,149 @@ def process_data():
         import traceback
         traceback.print_exc()
 
-async def handle_client(reader, writer):
-    """Optimized client handler with better buffer management"""
-    peer = writer.get_extra_info('peername')
-    print(f"[Server] Client connected from {peer}")
-    
-    try:
-        while True:
-            # 1. Read Header (8 bytes)
-            header = await reader.readexactly(8)
-            
-            # 2. Validate signature
-            if header[:4] != b'\xff\xff\xff\xff':
+class VoxelProtocol(asyncio.BufferedProtocol):
+    """Client handler that receives packets into one reusable buffer.
+
+    BufferedProtocol hands the transport a memoryview into our own
+    bytearray, so incoming bytes land directly in it - no per-read bytes
+    allocation and no StreamReader copy on the hot path.
+    """
+
+    HEADER_SIZE = 8
+    def __init__(self):
+        self._buf = bytearray(1 << 20)
+        self._view = memoryview(self._buf)
+        self._filled = 0
+        self._transport = None
+        self._peer = None
+        self._loop = asyncio.get_running_loop()
+
+    def connection_made(self, transport):
+        self._transport = transport
+        self._peer = transport.get_extra_info('peername')
+        print(f"[Server] Client connected from {self._peer}")
+
+        # Disable Nagle and widen the kernel receive buffer - small headers
+        # must not sit in a 40 ms coalescing window at 30-60 FPS
+        sock = transport.get_extra_info('socket')
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+
+    def connection_lost(self, exc):
+        if exc is not None:
+            print(f"[Server] Connection Error: {exc}")
+        print(f"[Server] Connection from {self._peer} closed.")
+
+    def _grow(self, size):
+        """Resize the receive buffer, keeping any partial packet."""
+        size = min(size, MAX_PACKET + self.HEADER_SIZE)
+        new = bytearray(size)
+        new[:self._filled] = self._view[:self._filled]
+        self._view.release()
+        self._buf = new
+        self._view = memoryview(new)
+
+    def get_buffer(self, sizehint):
+        if len(self._buf) - self._filled < (1 << 16):
+            self._grow(len(self._buf) * 2)
+        return self._view[self._filled:]
+
+    def buffer_updated(self, nbytes):
+        self._filled += nbytes
+        consumed = 0
+
+        # Parse every complete packet currently in the buffer
+        while self._filled - consumed >= self.HEADER_SIZE:
+            base = consumed
+
+            # Validate signature (last header byte carries the flags)
+            if self._buf[base:base + 3] != b'\xff\xff\xff':
                 print("[Server] Error: Invalid header signature.")
-                break
+                self._transport.close()
+                return
+            flags = self._buf[base + 3]
 
-            # 3. Extract length
-            packet_length = struct.unpack('!I', header[4:])[0]
-            
-            # Sanity check packet length (prevent memory attacks)
-            if packet_length > 10_000_000:  # 10MB max
+            packet_length = struct.unpack_from('!I', self._buf, base + 4)[0]
+            if packet_length > MAX_PACKET:
                 print(f"[Server] Error: Packet too large ({packet_length} bytes)")
-                break
-            
-            # 4. Read Payload
-            compressed_data = await reader.readexactly(packet_length)
-            
-            # 5. Decompress in background (non-blocking for network)
-            try:
-                decompressed = gzip.decompress(compressed_data)
-                
-                # Only keep latest frame (drop old ones)
-                with queue_lock:
-                    frame_queue.append(decompressed)
-                    
-            except gzip.BadGzipFile:
-                print("[Server] Error: Bad GZIP data.")
-                continue
-            except Exception as e:
-                print(f"[Server] Decompression error: {e}")
-                continue
+                self._transport.close()
+                return
 
-    except asyncio.IncompleteReadError:
-        print(f"[Server] Client {peer} disconnected (stream ended).")
-    except ConnectionResetError:
-        print(f"[Server] Client {peer} connection reset.")
-    except Exception as e:
-        print(f"[Server] Connection Error: {e}")
-    finally:
+            if self._filled - consumed < self.HEADER_SIZE + packet_length:
+                break  # Packet incomplete, wait for more data
+
+            payload = self._view[base + self.HEADER_SIZE:
+                                 base + self.HEADER_SIZE + packet_length]
+            self._dispatch(flags, payload)
+            consumed += self.HEADER_SIZE + packet_length
+
+        # Move any partial packet to the front so reads stay sequential
+        if consumed:
+            remaining = self._filled - consumed
+            if remaining:
+                self._buf[:remaining] = self._view[consumed:self._filled]
+            self._filled = remaining
+
+    def _dispatch(self, flags, payload):
+        """Queue one frame; payload is a view into the receive buffer."""
+        if flags & FLAG_GZIP:
+            decompress = decompress_frame
+        elif not flags & FLAG_NO_ZSTD:
+            decompress = decompress_zstd
+        else:
+            frame_queue.append((flags, bytes(payload)))
+            frame_ready.set()
+            return
+
+        # Snapshot the view before the buffer is reused, decompress
+        # off-loop, then queue from the callback
+        future = self._loop.run_in_executor(
+            decompress_pool, decompress, bytes(payload))
+        future.add_done_callback(
+            lambda f, flags=flags: self._queue_frame(flags, f))
+
+    def _queue_frame(self, flags, future):
         try:
-            writer.close()
-            await writer.wait_closed()
-        except:
-            pass
-        print(f"[Server] Connection from {peer} closed.")
+            frame_queue.append((flags, future.result()))
+            frame_ready.set()
+        except Exception as e:
+            print(f"[Server] Decompression error: {e}")
 
 async def main():
     """Main server with optimized settings"""
     host = '0.0.0.0'  # Listen on ALL interfaces
     port = 0x5658
-    
+
     print(f"[Main] Voxel Receiver starting...")
     print(f"[Main] Display: {voxels_x}x{voxels_y}x{voxels_z}")
     print(f"[Main] Listening on {host}:{port}")
-    
+
+    # 3.12+ releases the GIL in more hot paths (mmap setup, zlib);
+    # older versions still work but serialize more under load
+    if sys.version_info < (3, 12):
+        print(f"[Main] Note: Python {sys.version_info.major}.{sys.version_info.minor}"
+              " detected; 3.12+ is recommended for best throughput")
+
+    # Keep the event loop off the processing thread's core (best-effort)
+    try:
+        os.sched_setaffinity(0, {0, 1})
+    except (AttributeError, OSError):
+        pass
+
     # Start processing thread
     proc_thread = threading.Thread(target=process_data, daemon=True)
     proc_thread.start()
-    
+
     # Create server with optimized settings
-    server = await asyncio.start_server(
-        handle_client, 
-        host, 
+    loop = asyncio.get_running_loop()
+    server = await loop.create_server(
+        VoxelProtocol,
+        host,
         port,
         backlog=5,  # Limit connection queue
     )
-    
+
     async with server:
         print("[Main] Server ready!")
         await server.serve_forever()
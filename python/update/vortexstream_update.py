@@ -1,5 +1,7 @@
 import bpy
 import bmesh
+import concurrent.futures
+import os
 import socket
 import struct
 import gzip
@@ -7,7 +9,35 @@ import numpy as np
 from mathutils import Vector
 from collections import defaultdict
 import threading
-import time
+
+# Numba compiles the RGB->332 ufunc when available; the plain NumPy
+# expression below is the fallback
+try:
+    from numba import vectorize, uint8, float32
+except ImportError:
+    vectorize = None
+
+# zstd level 1 compresses these frames in well under a millisecond where
+# gzip level 1 takes tens; fall back to gzip (legacy header) without it
+try:
+    import zstandard as zstd
+    _zstd_compressor = zstd.ZstdCompressor(level=1, threads=0)
+except ImportError:
+    zstd = None
+
+# CuPy moves the DDA expansion and grid scatter for big meshes onto the
+# GPU; everything falls back to the NumPy path without it
+try:
+    import cupy as cp
+except ImportError:
+    cp = None
+
+# Header flags, matching the receiver (legacy senders put 0xff in the
+# fourth header byte, i.e. every bit set)
+FLAG_GZIP = 0x01       # set = gzip-compressed payload
+FLAG_AOS = 0x02        # set = interleaved BBBB records, clear = SoA planes
+FLAG_NO_ZSTD = 0x04    # clear = zstd-compressed payload
+FLAG_NO_PACKED = 0x08  # clear = packed '<u4' points (x<<25|y<<18|z<<12|c<<4)
 
 # --- CONFIGURATION ---
 HOST_IP = '192.168.1.40'  # Your Raspberry Pi IP
@@ -17,11 +47,19 @@ VOX_X = 128
 VOX_Y = 128
 VOX_Z = 64
 
+# Upper bounds as an array so whole point batches are range-checked with
+# one vectorized mask; the scalar is_in_bounds stays for non-hot callers
+BOUNDS = np.array([VOX_X, VOX_Y, VOX_Z], dtype=np.int32)
+
 # Capture volume bounds (adjust to your needs)
 # Use cubic volume for proper aspect ratio
 CAPTURE_MIN = Vector((-5, -5, -2.5))
 CAPTURE_MAX = Vector((5, 5, 2.5))
 
+# Array copies of the capture bounds for vectorized overlap tests
+CAPTURE_MIN_ARR = np.array(CAPTURE_MIN, dtype=np.float32)
+CAPTURE_MAX_ARR = np.array(CAPTURE_MAX, dtype=np.float32)
+
 # Performance settings
 VOXEL_SAMPLE_RATE = 1.0  # 1.0 = sample every voxel, 0.5 = every other voxel
 SURFACE_THICKNESS = 1    # How many voxel layers thick surfaces are
@@ -30,11 +68,33 @@ MAX_POINTS_PER_FRAME = 100000  # Limit points to prevent overload
 
 # --- COLOR CONVERSION ---
 def rgb_to_332(r, g, b):
-    """Convert RGB float (0-1) to 332 format (RRR GG BB)"""
+    """Convert RGB float (0-1) to 332 format (RRR GGG BB)"""
     r_bits = int(r * 7) & 0x07
-    g_bits = int(g * 3) & 0x03
+    g_bits = int(g * 7) & 0x07
     b_bits = int(b * 3) & 0x03
-    return (r_bits << 5) | (g_bits << 3) | b_bits
+    return (r_bits << 5) | (g_bits << 2) | b_bits
+
+# Array form of rgb_to_332 for per-vertex colour layers: a compiled
+# ufunc that runs elementwise across whole float arrays with no Python
+# per-call overhead, or the equivalent NumPy expression without Numba
+if vectorize is not None:
+    @vectorize([uint8(float32, float32, float32)], target='parallel')
+    def rgb_to_332_np(r, g, b):
+        return (uint8(r * 7) << 5) | (uint8(g * 7) << 2) | uint8(b * 3)
+else:
+    def rgb_to_332_np(r, g, b):
+        return (((r * 7).astype(np.uint8) << 5)
+                | ((g * 7).astype(np.uint8) << 2)
+                | (b * 3).astype(np.uint8))
+
+def rgb_to_332_vec(r, g, b):
+    """Branch-free 332 packing: round floats to 8-bit once, then take the
+    top bits of each channel with masks and shifts. Three SIMD-backed
+    NumPy ops per channel, no multiplies against the per-level scales."""
+    r8 = (r * 255 + 0.5).astype(np.uint8)
+    g8 = (g * 255 + 0.5).astype(np.uint8)
+    b8 = (b * 255 + 0.5).astype(np.uint8)
+    return (r8 & 0xE0) | ((g8 >> 3) & 0x1C) | (b8 >> 6)
 
 def world_to_voxel(world_pos):
     """Convert world coordinates to voxel coordinates with aspect ratio correction"""
@@ -80,235 +140,423 @@ def get_object_color(obj):
     
     return 1.0, 1.0, 1.0  # White default
 
-def bresenham_3d(x0, y0, z0, x1, y1, z1):
-    """3D Bresenham line algorithm for solid voxel lines"""
-    points = []
-    
-    dx = abs(x1 - x0)
-    dy = abs(y1 - y0)
-    dz = abs(z1 - z0)
-    
-    sx = 1 if x0 < x1 else -1
-    sy = 1 if y0 < y1 else -1
-    sz = 1 if z0 < z1 else -1
-    
-    # Driving axis
-    if dx >= dy and dx >= dz:
-        err_y = 2 * dy - dx
-        err_z = 2 * dz - dx
-        while x0 != x1:
-            points.append((x0, y0, z0))
-            if err_y > 0:
-                y0 += sy
-                err_y -= 2 * dx
-            if err_z > 0:
-                z0 += sz
-                err_z -= 2 * dx
-            err_y += 2 * dy
-            err_z += 2 * dz
-            x0 += sx
-    elif dy >= dx and dy >= dz:
-        err_x = 2 * dx - dy
-        err_z = 2 * dz - dy
-        while y0 != y1:
-            points.append((x0, y0, z0))
-            if err_x > 0:
-                x0 += sx
-                err_x -= 2 * dy
-            if err_z > 0:
-                z0 += sz
-                err_z -= 2 * dy
-            err_x += 2 * dx
-            err_z += 2 * dz
-            y0 += sy
-    else:
-        err_x = 2 * dx - dz
-        err_y = 2 * dy - dz
-        while z0 != z1:
-            points.append((x0, y0, z0))
-            if err_x > 0:
-                x0 += sx
-                err_x -= 2 * dz
-            if err_y > 0:
-                y0 += sy
-                err_y -= 2 * dz
-            err_x += 2 * dx
-            err_y += 2 * dy
-            z0 += sz
-    
-    points.append((x1, y1, z1))
-    return points
+def _clip_segments(xp, p0, p1):
+    """Vectorized slab clip of segments p0[i] -> p1[i] to the grid.
 
-def clip_line_to_bounds(p0, p1):
+    Returns float endpoint arrays (q0, q1) of the in-bounds spans, with
+    segments that miss the volume dropped. The clamped spans are bounded
+    by the grid extents, so the DDA sample count stays bounded without
+    subsampling long edges. `xp` is numpy or cupy.
     """
-    Clip a 3D line segment to the voxel bounds using Liang-Barsky algorithm.
-    Returns clipped endpoints or None if line is completely outside.
+    bounds = xp.asarray(BOUNDS)
+    p0f = p0.astype(xp.float32)
+    df = (p1 - p0).astype(xp.float32)
+
+    # Parametric window [lo, hi] per axis, with the slab planes at the
+    # rounding boundaries (+-0.5 around the edge voxel centres, pulled in
+    # a hair so rint never lands outside) - a coordinate of -0.4 still
+    # rounds to voxel 0 and must survive the clip. A zero-delta axis
+    # passes everything or nothing depending on whether it is in range.
+    safe = xp.where(df == 0, 1, df)
+    t_a = (-0.5 + 1e-3 - p0f) / safe
+    t_b = (bounds - 0.5 - 1e-3 - p0f) / safe
+    lo = xp.minimum(t_a, t_b)
+    hi = xp.maximum(t_a, t_b)
+    in_rng = (p0 >= 0) & (p0 <= bounds - 1)
+    lo = xp.where(df == 0, xp.where(in_rng, -xp.inf, xp.inf), lo)
+    hi = xp.where(df == 0, xp.where(in_rng, xp.inf, -xp.inf), hi)
+
+    t_enter = xp.maximum(lo.max(axis=1), 0.0)
+    t_exit = xp.minimum(hi.min(axis=1), 1.0)
+    valid = t_exit >= t_enter
+
+    q0 = p0f[valid] + t_enter[valid, None] * df[valid]
+    q1 = p0f[valid] + t_exit[valid, None] * df[valid]
+    return q0, q1
+
+def edge_dda(p0, p1):
+    """Voxels along every segment p0[i] -> p1[i], batched across segments.
+
+    One vectorized DDA replaces the per-edge Bresenham calls. Each edge
+    is first clamped to its in-bounds parametric span, so an edge whose
+    endpoints lie far outside still gets one sample per voxel it crosses
+    inside the volume - never subsampled. Returns an (N,3) int32 array
+    that may contain duplicates; callers dedup afterwards.
     """
-    x0, y0, z0 = p0
-    x1, y1, z1 = p1
-    
-    dx = x1 - x0
-    dy = y1 - y0
-    dz = z1 - z0
-    
-    t_min = 0.0
-    t_max = 1.0
-    
-    # Check each axis
-    bounds = [
-        (-dx, x0, 0),           # Left (x = 0)
-        (dx, VOX_X - 1 - x0, 0),# Right (x = VOX_X-1)
-        (-dy, y0, 1),           # Bottom (y = 0)
-        (dy, VOX_Y - 1 - y0, 1),# Top (y = VOX_Y-1)
-        (-dz, z0, 2),           # Front (z = 0)
-        (dz, VOX_Z - 1 - z0, 2) # Back (z = VOX_Z-1)
-    ]
-    
-    for p, q, axis in bounds:
-        if p == 0:
-            # Line is parallel to this plane
-            if q < 0:
-                return None  # Line is outside
-        else:
-            t = q / p
-            if p < 0:
-                # Entering
-                t_min = max(t_min, t)
-            else:
-                # Exiting
-                t_max = min(t_max, t)
-            
-            if t_min > t_max:
-                return None  # Line is completely outside
-    
-    # Calculate clipped endpoints
-    clipped_x0 = int(x0 + t_min * dx)
-    clipped_y0 = int(y0 + t_min * dy)
-    clipped_z0 = int(z0 + t_min * dz)
-    
-    clipped_x1 = int(x0 + t_max * dx)
-    clipped_y1 = int(y0 + t_max * dy)
-    clipped_z1 = int(z0 + t_max * dz)
-    
-    # Clamp to ensure within bounds (floating point safety)
-    clipped_x0 = max(0, min(VOX_X - 1, clipped_x0))
-    clipped_y0 = max(0, min(VOX_Y - 1, clipped_y0))
-    clipped_z0 = max(0, min(VOX_Z - 1, clipped_z0))
-    
-    clipped_x1 = max(0, min(VOX_X - 1, clipped_x1))
-    clipped_y1 = max(0, min(VOX_Y - 1, clipped_y1))
-    clipped_z1 = max(0, min(VOX_Z - 1, clipped_z1))
-    
-    return (clipped_x0, clipped_y0, clipped_z0), (clipped_x1, clipped_y1, clipped_z1)
+    q0, q1 = _clip_segments(np, p0, p1)
+    if not len(q0):
+        return np.empty((0, 3), dtype=np.int32)
+
+    d = q1 - q0
+    n = np.abs(np.rint(q1) - np.rint(q0)).max(axis=1).astype(np.int64) + 1
+    p0_rep = np.repeat(q0, n, axis=0)
+    d_rep = np.repeat(d, n, axis=0)
+
+    # Per-segment step index 0..n[i]-1, then parameter t in [0, 1]
+    cum = np.cumsum(n)
+    steps = np.arange(cum[-1]) - np.repeat(cum - n, n)
+    t = steps / np.repeat(np.maximum(n - 1, 1), n)
+
+    return np.rint(p0_rep + t[:, None] * d_rep).astype(np.int32)
+
+# Vertex count above which the GPU path pays for its transfers; below
+# it the upload/download round-trip costs more than the NumPy pass
+GPU_MIN_VERTS = 50_000
+
+def _voxelize_snapshot_gpu(M_vox, coords, edge_idx, color):
+    """CuPy version of the vertex + edge voxelization for large meshes.
+
+    Same batched DDA as edge_dda, but the expansion, the bounds mask and
+    the dedup scatter all run on the GPU; only the surviving (occupied)
+    cells come back over the bus via argwhere.
+    """
+    M_g = cp.asarray(M_vox)
+    vox = (cp.asarray(coords) @ M_g[:3, :3].T + M_g[:3, 3]).astype(cp.int32)
+
+    parts = [vox]
+    if len(edge_idx):
+        e_idx = cp.asarray(edge_idx)
+        p0 = vox[e_idx[:, 0]]
+        p1 = vox[e_idx[:, 1]]
+        visible = ((cp.maximum(p0, p1) >= 0) &
+                   (cp.minimum(p0, p1) < cp.asarray(BOUNDS))).all(axis=1)
+        p0, p1 = p0[visible], p1[visible]
+        if len(p0):
+            # Same slab clamp as the CPU path: sample only the in-bounds
+            # span so long crossing edges are never subsampled
+            q0, q1 = _clip_segments(cp, p0, p1)
+        if len(p0) and len(q0):
+            d = q1 - q0
+            n = cp.abs(cp.rint(q1) - cp.rint(q0)).max(axis=1).astype(cp.int64) + 1
+            p0_rep = cp.repeat(q0, n.tolist(), axis=0)
+            d_rep = cp.repeat(d, n.tolist(), axis=0)
+            cum = cp.cumsum(n)
+            steps = cp.arange(int(cum[-1])) - cp.repeat((cum - n), n.tolist())
+            t = steps / cp.repeat(cp.maximum(n - 1, 1), n.tolist())
+            parts.append(cp.rint(p0_rep + t[:, None] * d_rep).astype(cp.int32))
+
+    pts = cp.concatenate(parts)
+    pts = pts[((pts >= 0) & (pts < cp.asarray(BOUNDS))).all(axis=1)]
+
+    # Dedup through a GPU occupancy grid (advanced-index scatter), then
+    # download only the occupied cells
+    occ = cp.zeros((VOX_X, VOX_Y, VOX_Z), dtype=cp.bool_)
+    occ[pts[:, 0], pts[:, 1], pts[:, 2]] = True
+    return cp.asnumpy(cp.argwhere(occ)).astype(np.int32), color
+
+def voxelize_triangles(tri):
+    """Surface-voxelize triangles given as an (F,3,3) float array of
+    voxel-space corners.
+
+    Schwarz-Seidel style: every grid cell in a triangle's AABB is tested
+    against the triangle's plane (slab of half the cell's L1 extent along
+    the normal) and the three edge functions in each coordinate-plane
+    projection, expanded by the cell half-extents. All (cell, triangle)
+    pairs are generated and tested in one vectorized pass. Returns the
+    (N,3) int32 cells the surfaces overlap, already clipped to the grid.
+    """
+    # Clip each AABB to the grid and drop triangles fully outside
+    lo = np.maximum(np.floor(tri.min(1)).astype(np.int32), 0)
+    hi = np.minimum(np.floor(tri.max(1)).astype(np.int32), BOUNDS - 1)
+    keep = (hi >= lo).all(axis=1)
+    tri, lo, hi = tri[keep], lo[keep], hi[keep]
+    if not len(tri):
+        return np.empty((0, 3), dtype=np.int32)
+
+    # Ragged expansion: one row per cell of every triangle's AABB
+    size = hi - lo + 1
+    m = size.prod(axis=1)
+    total = int(m.sum())
+    offsets = np.cumsum(m) - m
+    k = np.arange(total) - np.repeat(offsets, m)
+    tid = np.repeat(np.arange(len(tri)), m)
+
+    syz = (size[:, 1] * size[:, 2])[tid]
+    sz = size[:, 2][tid]
+    cell = np.empty((total, 3), dtype=np.int32)
+    cell[:, 0] = k // syz
+    rem = k - cell[:, 0] * syz
+    cell[:, 1] = rem // sz
+    cell[:, 2] = rem - cell[:, 1] * sz
+    cell += lo[tid]
+
+    p = cell + 0.5  # cell centres; cells are unit cubes in voxel space
+    v0 = tri[tid, 0]
+    n = np.cross(tri[tid, 1] - v0, tri[tid, 2] - v0)
+
+    # Plane overlap: centre within half the cell's L1 extent along n
+    ok = np.abs(((p - v0) * n).sum(axis=1)) <= 0.5 * np.abs(n).sum(axis=1) + 1e-6
+
+    # Edge-function overlap in the xy, yz and zx projections, each edge
+    # normal oriented by the triangle normal's sign on the dropped axis
+    # and offset by the cell half-extents
+    for a, b, c in ((0, 1, 2), (1, 2, 0), (2, 0, 1)):
+        sgn = np.where(n[:, c] >= 0, 1.0, -1.0)
+        for i, j in ((0, 1), (1, 2), (2, 0)):
+            vi = tri[tid, i]
+            e_a = tri[tid, j, a] - vi[:, a]
+            e_b = tri[tid, j, b] - vi[:, b]
+            ne_a = -e_b * sgn
+            ne_b = e_a * sgn
+            d = ne_a * (p[:, a] - vi[:, a]) + ne_b * (p[:, b] - vi[:, b])
+            ok &= d + 0.5 * (np.abs(ne_a) + np.abs(ne_b)) >= -1e-6
+
+    return cell[ok]
+
+# World -> voxel as one affine: scale by voxels-per-world-unit, with
+# -CAPTURE_MIN baked into the translation column. Composed with each
+# object's matrix_world this maps local coords directly to voxel indices.
+_vox_scale = np.array([VOX_X / (CAPTURE_MAX.x - CAPTURE_MIN.x),
+                       VOX_Y / (CAPTURE_MAX.y - CAPTURE_MIN.y),
+                       VOX_Z / (CAPTURE_MAX.z - CAPTURE_MIN.z)], dtype=np.float32)
+VOX_FROM_WORLD = np.diag(np.append(_vox_scale, 1.0)).astype(np.float32)
+VOX_FROM_WORLD[:3, 3] = -np.array(CAPTURE_MIN, dtype=np.float32) * _vox_scale
+
+# Worker pool for per-object voxelization; the heavy math is NumPy, which
+# releases the GIL, so threads scale with cores
+voxel_executor = concurrent.futures.ThreadPoolExecutor(max_workers=os.cpu_count())
+
+class ScratchArena:
+    """Named reusable NumPy buffers for the per-frame hot path.
+
+    take() hands out a leading-axis slice of a preallocated buffer,
+    growing it to the next power of two when a frame needs more rows.
+    Steady-state frames then allocate nothing, which keeps the GC quiet
+    during the modal timer.
+    """
+
+    def __init__(self):
+        self._bufs = {}
+
+    def take(self, name, shape, dtype):
+        if isinstance(shape, int):
+            shape = (shape,)
+        need = shape[0]
+        buf = self._bufs.get(name)
+        if (buf is None or buf.shape[0] < need
+                or buf.shape[1:] != shape[1:] or buf.dtype != np.dtype(dtype)):
+            rows = 1 << max(10, (need - 1).bit_length())
+            buf = np.empty((rows,) + shape[1:], dtype=dtype)
+            self._bufs[name] = buf
+        return buf[:need]
+
+_scratch = ScratchArena()
+
+# Dense per-frame grids instead of a Python voxel dict: a direct NumPy
+# store per point replaces hashing tuple keys, and the whole pair is only
+# ~1.25 MiB. The grids are shared across objects; writes are partitioned
+# into exclusive Z slabs so parallel rasterizer tasks never collide.
+COLOR_GRID = np.zeros((VOX_X, VOX_Y, VOX_Z), dtype=np.uint8)
+OCC_GRID = np.zeros((VOX_X, VOX_Y, VOX_Z), dtype=bool)
+
+SLAB_DEPTH = 8  # Z extent owned by each rasterizer task
+NUM_SLABS = VOX_Z // SLAB_DEPTH
+
+def _rasterize_slab(slab, pts, colors):
+    """Scatter the points whose Z falls in one slab and collect them.
+
+    Each task owns the [slab*SLAB_DEPTH, (slab+1)*SLAB_DEPTH) Z range of
+    the shared grids exclusively - the same tile-ownership trick tiled
+    rasterizers use - so no locking is needed.
+    """
+    z_lo = slab * SLAB_DEPTH
+    sel = pts[:, 2] // SLAB_DEPTH == slab
+    p = pts[sel]
+    c = colors[sel]
+
+    color_slab = COLOR_GRID[:, :, z_lo:z_lo + SLAB_DEPTH]
+    occ_slab = OCC_GRID[:, :, z_lo:z_lo + SLAB_DEPTH]
+    z_local = p[:, 2] - z_lo
+    color_slab[p[:, 0], p[:, 1], z_local] = c
+    occ_slab[p[:, 0], p[:, 1], z_local] = True
+
+    idx = np.argwhere(occ_slab)
+    out_colors = color_slab[idx[:, 0], idx[:, 1], idx[:, 2]]
+    occ_slab[...] = False
+    idx[:, 2] += z_lo
+    return np.column_stack([idx, out_colors]).astype(np.uint8)
+
+def rasterize_frame(batches):
+    """Merge per-object (points, color) batches through the shared grids.
+
+    Slab tasks run in parallel on the worker pool; duplicates collapse
+    both within and across objects. Returns an (N,4) uint8 array of
+    x, y, z, colour rows.
+    """
+    if not batches:
+        return np.empty((0, 4), dtype=np.uint8)
+
+    # Gather the batches into arena buffers instead of concatenating
+    # fresh arrays every frame
+    total = sum(len(p) for p, _ in batches)
+    pts = _scratch.take('frame_pts', (total, 3), np.int32)
+    colors = _scratch.take('frame_colors', total, np.uint8)
+    off = 0
+    for p, c in batches:
+        pts[off:off + len(p)] = p
+        colors[off:off + len(p)] = c
+        off += len(p)
+
+    slabs = list(voxel_executor.map(lambda s: _rasterize_slab(s, pts, colors),
+                                    range(NUM_SLABS)))
+    out = _scratch.take('frame_out', (sum(len(s) for s in slabs), 4), np.uint8)
+    return np.concatenate(slabs, out=out)
+
+# Flattened evaluated-mesh arrays per object name, invalidated by the
+# depsgraph handler below: to_mesh() forces modifier re-evaluation and
+# allocates a transient mesh, so only pay for it when geometry changed
+MESH_CACHE = {}
+DIRTY = set()
+
+def _on_depsgraph_update(scene, depsgraph):
+    """Record which datablocks changed so their mesh arrays get refetched."""
+    for update in depsgraph.updates:
+        DIRTY.add(update.id.name)
 
-def voxelize_object(obj):
-    """Convert mesh object to voxel points with smart edge clipping"""
+def snapshot_object(obj, depsgraph, dirty=frozenset()):
+    """Copy everything voxelization needs out of Blender on the main thread.
+
+    Blender RNA is not thread-safe, so the evaluated mesh is flattened to
+    plain NumPy arrays here; voxelize_snapshot can then run on any thread.
+    `dirty` is the caller's per-tick snapshot of changed datablock names.
+    """
     if obj.type != 'MESH':
-        return []
-    
-    # Get world matrix
-    mat = obj.matrix_world
-    
+        return None
+
     # Get object color
     r, g, b = get_object_color(obj)
     color = rgb_to_332(r, g, b)
-    
+
+    # Reuse the flattened arrays unless the depsgraph reported a change
+    # to this object or its mesh since they were fetched
+    cached = MESH_CACHE.get(obj.name)
+    if (cached is not None and obj.name not in dirty
+            and obj.data.name not in dirty):
+        coords, edge_idx, tri_idx = cached
+        return (np.asarray(obj.matrix_world, dtype=np.float32),
+                coords, edge_idx, tri_idx, color)
+
     # Use evaluated mesh (includes modifiers)
-    depsgraph = bpy.context.evaluated_depsgraph_get()
     obj_eval = obj.evaluated_get(depsgraph)
     mesh = obj_eval.to_mesh()
-    
-    voxel_dict = {}  # Use dict to avoid duplicates
-    
+
     try:
-        # First pass: Convert all vertices to voxel space (even if out of bounds)
-        # This is needed for edge calculations
-        all_voxel_verts = []
-        for vert in mesh.vertices:
-            world_pos = mat @ vert.co
-            vox_x, vox_y, vox_z = world_to_voxel(world_pos)
-            all_voxel_verts.append((vox_x, vox_y, vox_z))
-        
-        # Track which vertices are visible (within bounds)
-        visible_verts = set()
-        
-        # Add visible vertices
-        for idx, (vox_x, vox_y, vox_z) in enumerate(all_voxel_verts):
-            if is_in_bounds(vox_x, vox_y, vox_z):
-                voxel_dict[(vox_x, vox_y, vox_z)] = color
-                visible_verts.add(idx)
-        
-        # Second pass: Process edges with intelligent clipping
-        for edge in mesh.edges:
-            v0_idx, v1_idx = edge.vertices
-            
-            vox0 = all_voxel_verts[v0_idx]
-            vox1 = all_voxel_verts[v1_idx]
-            
-            v0_visible = v0_idx in visible_verts
-            v1_visible = v1_idx in visible_verts
-            
-            # Case 1: Both vertices visible - draw the line
-            if v0_visible and v1_visible:
-                if is_in_bounds(*vox0) and is_in_bounds(*vox1):
-                    line_points = bresenham_3d(*vox0, *vox1)
-                    for pt in line_points:
-                        voxel_dict[pt] = color
-            
-            # Case 2: At least one vertex visible or line passes through bounds
-            # Use line clipping to render partial edges
-            else:
-                clipped = clip_line_to_bounds(vox0, vox1)
-                if clipped is not None:
-                    clipped_p0, clipped_p1 = clipped
-                    # Draw the clipped portion
-                    line_points = bresenham_3d(*clipped_p0, *clipped_p1)
-                    for pt in line_points:
-                        if is_in_bounds(*pt):
-                            voxel_dict[pt] = color
-        
-        # Optional: Fill faces for solid appearance
+        # foreach_get memcpy's the underlying C data in one call
+        coords = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+        mesh.vertices.foreach_get("co", coords)
+        coords = coords.reshape(-1, 3)
+
+        edge_idx = np.empty(len(mesh.edges) * 2, dtype=np.int32)
+        mesh.edges.foreach_get("vertices", edge_idx)
+        edge_idx = edge_idx.reshape(-1, 2)
+
+        tri_idx = None
         if SURFACE_THICKNESS > 1:
-            for face in mesh.polygons:
-                # Get face center
-                center = mat @ face.center
-                vox_c = world_to_voxel(center)
-                
-                if is_in_bounds(*vox_c):
-                    # Add thickness around face center
-                    for dx in range(-SURFACE_THICKNESS//2, SURFACE_THICKNESS//2 + 1):
-                        for dy in range(-SURFACE_THICKNESS//2, SURFACE_THICKNESS//2 + 1):
-                            for dz in range(-SURFACE_THICKNESS//2, SURFACE_THICKNESS//2 + 1):
-                                px = vox_c[0] + dx
-                                py = vox_c[1] + dy
-                                pz = vox_c[2] + dz
-                                if is_in_bounds(px, py, pz):
-                                    voxel_dict[(px, py, pz)] = color
-    
+            # Triangulated connectivity through the loop-triangles API,
+            # same zero-copy route as vertices and edges
+            mesh.calc_loop_triangles()
+            tri_idx = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int32)
+            mesh.loop_triangles.foreach_get("vertices", tri_idx)
+            tri_idx = tri_idx.reshape(-1, 3)
     finally:
         obj_eval.to_mesh_clear()
-    
-    # Convert dict to list
-    points = [(x, y, z, c) for (x, y, z), c in voxel_dict.items()]
-    
-    return points
+
+    MESH_CACHE[obj.name] = (coords, edge_idx, tri_idx)
+
+    return (np.asarray(obj.matrix_world, dtype=np.float32),
+            coords, edge_idx, tri_idx, color)
+
+def voxelize_snapshot(snapshot):
+    """Voxelize one object snapshot; pure NumPy, safe on worker threads.
+
+    Returns (points, color): candidate in-bounds voxels, deduped later
+    by the slab rasterizer.
+    """
+    M, coords, edge_idx, tri_idx, color = snapshot
+
+    # Fuse capture-volume normalization with the object's world matrix:
+    # one 4x4 takes local coords straight to voxel indices, so the whole
+    # mesh transforms in a single matmul
+    M_vox = VOX_FROM_WORLD @ M
+
+    # Large meshes go through the GPU when CuPy is available; the
+    # (default-off) triangle fill stays on the CPU and is merged in
+    if cp is not None and len(coords) >= GPU_MIN_VERTS:
+        pts, _ = _voxelize_snapshot_gpu(M_vox, coords, edge_idx, color)
+        if tri_idx is not None and len(tri_idx):
+            vox_f = coords @ M_vox[:3, :3].T + M_vox[:3, 3]
+            pts = np.concatenate([pts, voxelize_triangles(vox_f[tri_idx])])
+        return pts, color
+
+    # First pass: Convert all vertices to voxel space (even if out of
+    # bounds - needed for edge calculations)
+    all_voxel_verts = (coords @ M_vox[:3, :3].T + M_vox[:3, 3]).astype(np.int32)
+
+    # Vertices seed the point cloud
+    parts = [all_voxel_verts]
+
+    # Second pass: rasterize all edges in one batched DDA - the work is
+    # embarrassingly parallel across edges, so one NumPy pass replaces
+    # per-edge Liang-Barsky clipping; out-of-bounds samples fall to the
+    # combined mask below. A cheap per-edge AABB reject drops edges that
+    # lie entirely outside the volume before they reach the DDA.
+    if len(edge_idx):
+        e0 = all_voxel_verts[edge_idx[:, 0]]
+        e1 = all_voxel_verts[edge_idx[:, 1]]
+        visible = ((np.maximum(e0, e1) >= 0) &
+                   (np.minimum(e0, e1) < BOUNDS)).all(axis=1)
+        if visible.any():
+            parts.append(edge_dda(e0[visible], e1[visible]))
+
+    # Optional: Fill faces for solid appearance - proper surface
+    # voxelization of every triangle, not a cube stamped on each centre
+    if tri_idx is not None and len(tri_idx):
+        vox_f = coords @ M_vox[:3, :3].T + M_vox[:3, 3]
+        parts.append(voxelize_triangles(vox_f[tri_idx]))
+
+    # One combined bounds mask over everything this object produced
+    pts = np.concatenate(parts)
+    pts = pts[((pts >= 0) & (pts < BOUNDS)).all(axis=1)]
+
+    return pts, color
 
 def generate_packet(points):
-    """Create compressed packet for transmission"""
+    """Create compressed packet from an (N,4) uint8 array of x,y,z,colour"""
     # Limit points to prevent overload
     if len(points) > MAX_POINTS_PER_FRAME:
         points = points[:MAX_POINTS_PER_FRAME]
-    
-    # Pack into binary
-    raw_data = bytearray()
-    for p in points:
-        raw_data.extend(struct.pack('BBBB', *p))
-    
+
+    # Pack each point into one little-endian uint32: x and y are 7 bits,
+    # z is 6 and colour 8, so the whole record fits with 4 bits to spare.
+    # Shift-or passes through arena buffers, with the key array handed
+    # straight to the compressor (buffer protocol) - no temporaries and
+    # no tobytes copy.
+    n = len(points)
+    pts32 = _scratch.take('pkt_pts32', (n, 4), np.uint32)
+    np.copyto(pts32, points)
+    key = _scratch.take('pkt_key', n, '<u4')
+    tmp = _scratch.take('pkt_tmp', n, '<u4')
+    np.left_shift(pts32[:, 0], 25, out=key)
+    np.left_shift(pts32[:, 1], 18, out=tmp)
+    key |= tmp
+    np.left_shift(pts32[:, 2], 12, out=tmp)
+    key |= tmp
+    np.left_shift(pts32[:, 3], 4, out=tmp)
+    key |= tmp
+    # Byte view so len() means bytes for the compressors (gzip stores it
+    # in the trailer); still zero-copy
+    raw_data = key.view(np.uint8)
+
     # Compress
-    compressed = gzip.compress(raw_data, compresslevel=1)  # Fast compression
-    header = b'\xff\xff\xff\xff'
+    if zstd is not None:
+        compressed = _zstd_compressor.compress(raw_data)
+        header = b'\xff\xff\xff' + bytes(
+            [0xff & ~(FLAG_GZIP | FLAG_NO_ZSTD | FLAG_NO_PACKED)])
+    else:
+        compressed = gzip.compress(raw_data, compresslevel=1)  # Fast compression
+        header = b'\xff\xff\xff' + bytes([0xff & ~FLAG_NO_PACKED])
     length = struct.pack('>I', len(compressed))
-    
+
     return header + length + compressed
 
 # --- NETWORK THREAD ---
@@ -319,14 +567,24 @@ class VoxelSender:
         self.sock = None
         self.running = False
         self.thread = None
-        self.packet_queue = []
-        self.lock = threading.Lock()
+        # One-slot latest-wins handoff: single producer (modal timer),
+        # single consumer (sender thread). A plain attribute swap is
+        # atomic under the GIL, so no lock is needed; the event wakes
+        # the sender instead of a polling sleep.
+        self._latest = None
+        self._event = threading.Event()
         
     def connect(self):
         """Establish connection to receiver"""
         try:
             self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.sock.connect((self.host, self.port))
+            # Disable Nagle so each frame leaves immediately, size the
+            # send buffer to hold a whole packet so sendall never blocks
+            # mid-frame, and keepalive so a dead receiver is noticed
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1 << 20)
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
             print(f"✓ Connected to {self.host}:{self.port}")
             return True
         except Exception as e:
@@ -334,27 +592,25 @@ class VoxelSender:
             return False
     
     def send_packet(self, packet):
-        """Queue packet for sending"""
-        with self.lock:
-            # Keep only latest packet to reduce lag
-            self.packet_queue = [packet]
-    
+        """Hand the latest packet to the sender thread, replacing any unsent one"""
+        self._latest = packet
+        self._event.set()
+
     def _send_loop(self):
         """Background thread for sending packets"""
         while self.running:
-            packet = None
-            with self.lock:
-                if self.packet_queue:
-                    packet = self.packet_queue.pop(0)
-            
+            # Block until a packet arrives (or stop() wakes us)
+            self._event.wait()
+            packet = self._latest
+            self._latest = None
+            self._event.clear()
+
             if packet:
                 try:
                     self.sock.sendall(packet)
                 except Exception as e:
                     print(f"✗ Send error: {e}")
                     break
-            else:
-                time.sleep(0.001)  # Small sleep to prevent CPU spinning
     
     def start(self):
         """Start background sender thread"""
@@ -368,6 +624,7 @@ class VoxelSender:
     def stop(self):
         """Stop sender and close connection"""
         self.running = False
+        self._event.set()  # Wake the sender thread so it can exit
         if self.thread:
             self.thread.join(timeout=1.0)
         if self.sock:
@@ -377,6 +634,12 @@ class VoxelSender:
 # --- GLOBAL SENDER ---
 sender = None
 
+# Per-object voxelization cache: (name, mesh name, matrix_world) -> the
+# (points, color) batch from voxelize_snapshot. Static objects hit every
+# frame and skip snapshot + voxelization entirely; entries not seen in a
+# frame are evicted so deleted objects don't linger
+VOXEL_CACHE = {}
+
 # --- BLENDER MODAL OPERATOR ---
 class VOXEL_OT_stream(bpy.types.Operator):
     """Stream Blender scene to voxel display"""
@@ -391,28 +654,76 @@ class VOXEL_OT_stream(bpy.types.Operator):
             return {'CANCELLED'}
         
         if event.type == 'TIMER':
-            # Voxelize all visible mesh objects in capture volume
-            all_points = []
-            
+            # Snapshot all visible mesh objects in the capture volume on
+            # the main thread (Blender RNA is not thread-safe), then
+            # voxelize the pure-NumPy snapshots across the worker pool
+            depsgraph = context.evaluated_depsgraph_get()
+            batches = []
+            misses = []
+            seen = set()
+
+            # Consume the dirty set once for the whole tick: clearing
+            # names per object let the first user of a shared mesh
+            # datablock wipe the flag before its linked duplicates were
+            # processed, freezing them on stale caches
+            dirty = set(DIRTY)
+            DIRTY.difference_update(dirty)
+
             for obj in context.scene.objects:
                 if obj.type == 'MESH' and not obj.hide_render and not obj.hide_viewport:
-                    # Quick bounds check
-                    bbox_min = Vector((min(v[i] for v in obj.bound_box) for i in range(3)))
-                    bbox_max = Vector((max(v[i] for v in obj.bound_box) for i in range(3)))
-                    
-                    # Transform to world space
-                    bbox_min = obj.matrix_world @ bbox_min
-                    bbox_max = obj.matrix_world @ bbox_max
-                    
+                    # Quick bounds check: transform all 8 bound_box corners
+                    # in one matmul and reduce, instead of min/max generator
+                    # expressions plus two matrix-vector products
+                    M = np.asarray(obj.matrix_world, dtype=np.float32)
+                    bb = np.asarray(obj.bound_box, dtype=np.float32)
+                    bb_world = bb @ M[:3, :3].T + M[:3, 3]
+                    bbox_min = bb_world.min(axis=0)
+                    bbox_max = bb_world.max(axis=0)
+
                     # Check if object intersects capture volume
-                    if not (bbox_max.x < CAPTURE_MIN.x or bbox_min.x > CAPTURE_MAX.x or
-                            bbox_max.y < CAPTURE_MIN.y or bbox_min.y > CAPTURE_MAX.y or
-                            bbox_max.z < CAPTURE_MIN.z or bbox_min.z > CAPTURE_MAX.z):
-                        points = voxelize_object(obj)
-                        all_points.extend(points)
-            
+                    if not np.any((bbox_max < CAPTURE_MIN_ARR) |
+                                  (bbox_min > CAPTURE_MAX_ARR)):
+                        # Unmoved objects reuse last frame's voxelization.
+                        # The key doesn't change when only geometry does
+                        # (deform modifiers, shape keys, armatures), so a
+                        # depsgraph-dirty object must bypass and evict
+                        # its entry or it would render frozen forever.
+                        key = (obj.name, obj.data.name,
+                               tuple(obj.matrix_world[i][j]
+                                     for i in range(4) for j in range(4)))
+                        seen.add(key)
+                        if obj.name in dirty or obj.data.name in dirty:
+                            VOXEL_CACHE.pop(key, None)
+                            cached = None
+                        else:
+                            cached = VOXEL_CACHE.get(key)
+                        if cached is not None:
+                            if len(cached[0]):
+                                batches.append(cached)
+                            continue
+                        snapshot = snapshot_object(obj, depsgraph, dirty)
+                        if snapshot is not None:
+                            misses.append((key, snapshot))
+
+            for (key, _), batch in zip(misses,
+                                       voxel_executor.map(voxelize_snapshot,
+                                                          [s for _, s in misses])):
+                VOXEL_CACHE[key] = batch
+                if len(batch[0]):
+                    batches.append(batch)
+
+            # Evict anything that went unseen (deleted, hidden or moved)
+            seen_names = {key[0] for key in seen}
+            for key in list(VOXEL_CACHE):
+                if key not in seen:
+                    del VOXEL_CACHE[key]
+            for name in list(MESH_CACHE):
+                if name not in seen_names:
+                    del MESH_CACHE[name]
+            all_points = rasterize_frame(batches)
+
             # Send to display
-            if sender and all_points:
+            if sender and len(all_points):
                 packet = generate_packet(all_points)
                 sender.send_packet(packet)
             
@@ -492,12 +803,20 @@ classes = (
 def register():
     for cls in classes:
         bpy.utils.register_class(cls)
+    if _on_depsgraph_update not in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.append(_on_depsgraph_update)
 
 def unregister():
     global sender
     if sender:
         sender.stop()
-    
+
+    if _on_depsgraph_update in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(_on_depsgraph_update)
+    MESH_CACHE.clear()
+    VOXEL_CACHE.clear()
+    DIRTY.clear()
+
     for cls in reversed(classes):
         bpy.utils.unregister_class(cls)
 